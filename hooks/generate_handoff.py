@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
-import json, sys, os
+import json, sys, os, mmap
+from collections import deque
 from datetime import datetime
 
+try:
+    from orjson import loads as _loads  # 설치되어 있으면 더 빠른 파서 사용
+except ImportError:
+    from json import loads as _loads
+
 input_data = json.load(sys.stdin)
 transcript_path = input_data.get("transcript_path", "")
 trigger = input_data.get("trigger", "unknown")  # "manual" or "auto"
@@ -9,36 +15,67 @@ project_dir = os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())
 handoff_dir = os.path.join(project_dir, "docs", "handoffs")
 os.makedirs(handoff_dir, exist_ok=True)
 
-# 트랜스크립트 파싱
-messages = []
+def parse_line(line):
+    """트랜스크립트 한 줄을 메시지로 파싱한다. 메시지가 아니면 None."""
+    # 메시지(JSON 객체)가 아닌 줄(빈 줄, 로그 노이즈)은 파싱 전에 건너뜀
+    if line[:1] != b"{":
+        return None
+    try:
+        return _loads(line)
+    except ValueError:
+        return None
+
+
+# 트랜스크립트 파싱 (마지막 80개 메시지만 유지)
+# 총 메시지 수 = '{'로 시작하는 줄 수 — 전체를 파싱하지 않으므로 깨진 줄도 포함된다 (두 경로 동일)
+tail = deque(maxlen=80)
+total = 0
 if transcript_path and os.path.exists(transcript_path):
-    with open(transcript_path, "r") as f:
-        for line in f:
-            try:
-                msg = json.loads(line)
-                messages.append(msg)
-            except:
-                pass
-
-# 최근 메시지에서 주요 내용 추출
-recent_messages = messages[-80:]  # 마지막 80개 메시지
-assistant_msgs = [
-    m for m in recent_messages 
-    if m.get("role") == "assistant" and isinstance(m.get("content"), str)
-]
-
-# 파일 변경 추적 (Write/Edit 도구 사용 내역)
-changed_files = set()
-for m in recent_messages:
-    if m.get("role") == "assistant":
-        content = m.get("content", [])
-        if isinstance(content, list):
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "tool_use":
-                    tool_input = block.get("input", {})
-                    file_path = tool_input.get("file_path", "")
-                    if file_path:
-                        changed_files.add(file_path)
+    with open(transcript_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):  # 빈 파일 등 mmap 불가 → 순차 읽기
+            mm = None
+
+        if mm is None:
+            for line in f:
+                if line[:1] == b"{":
+                    total += 1
+                msg = parse_line(line)
+                if msg is not None:
+                    tail.append(msg)
+        else:
+            with mm:
+                # 끝에서부터 줄 단위로 거슬러 올라가며 필요한 80개만 파싱
+                end = len(mm)
+                while end >= 0 and len(tail) < tail.maxlen:
+                    nl = mm.rfind(b"\n", 0, end)
+                    msg = parse_line(mm[nl + 1:end])
+                    if msg is not None:
+                        tail.appendleft(msg)
+                    end = nl
+
+                # 총 메시지 수는 나머지 줄을 파싱하지 않고 바이트만 스캔해서 센다
+                total = int(mm[:1] == b"{")
+                for pos in range(0, len(mm), 1 << 20):
+                    total += mm[pos:pos + (1 << 20) + 1].count(b"\n{")
+
+# 최근 메시지에서 주요 내용 추출 — 파일 변경 추적(Write/Edit 도구 사용 내역) + 최근 요약
+changed_files = {}  # 파일 경로 → 마크다운 목록 줄 (파일당 한 번만 포맷)
+summaries = deque(maxlen=5)
+for m in tail:
+    if m.get("role") != "assistant":
+        continue
+    content = m.get("content")
+    if isinstance(content, list):
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "tool_use":
+                file_path = (block.get("input") or {}).get("file_path")
+                if file_path and file_path not in changed_files:
+                    changed_files[file_path] = f"- `{file_path}`"
+    elif isinstance(content, str):
+        # maxlen=5 — 오래된 요약은 자동으로 밀려남. 200자 이하면 자르지 않고 그대로 사용
+        summaries.append(content if len(content) <= 200 else content[:200])
 
 now = datetime.now()
 timestamp = now.strftime("%Y.%m.%d %H:%M")
@@ -50,14 +87,14 @@ handoff = f"""# 인수인계 기록
 
 ### 세션 정보
 - 세션 ID: {input_data.get('session_id', 'N/A')}
-- 총 메시지 수: {len(messages)}
+- 총 메시지 수 (트랜스크립트 줄 기준): {total}
 - 트리거: {'수동 /compact' if trigger == 'manual' else '자동 컴팩트'}
 
 ### 변경된 파일
-{chr(10).join(f'- `{f}`' for f in sorted(changed_files)) if changed_files else '- 없음'}
+{chr(10).join([changed_files[f] for f in sorted(changed_files)]) or '- 없음'}
 
 ### 최근 대화 요약
-{chr(10).join(f'- {m.get("content", "")[:200]}' for m in assistant_msgs[-5:])}
+{chr(10).join([f'- {c}' for c in summaries])}
 
 ### 다음 작업
 - [ ] (수동 작성 필요)
@@ -66,10 +103,16 @@ handoff = f"""# 인수인계 기록
 - (수동 작성 필요)
 """
 
-# 최신 인수인계서 (항상 덮어쓰기)
-with open(os.path.join(project_dir, "HANDOFF.md"), "w") as f:
-    f.write(handoff)
+data = handoff.encode("utf-8")
 
 # 아카이브 (히스토리 보존)
-with open(os.path.join(handoff_dir, f"handoff_{filename}.md"), "w") as f:
-    f.write(handoff)
\ No newline at end of file
+with open(os.path.join(handoff_dir, f"handoff_{filename}.md"), "wb") as f:
+    f.write(data)
+
+# 최신 인수인계서 (항상 덮어쓰기) — 임시 파일에 쓴 뒤 교체.
+# 아카이브와 별도 파일이므로 HANDOFF.md를 수정해도 아카이브 스냅샷은 그대로 유지된다.
+handoff_path = os.path.join(project_dir, "HANDOFF.md")
+tmp_path = handoff_path + ".tmp"
+with open(tmp_path, "wb") as f:
+    f.write(data)
+os.replace(tmp_path, handoff_path)
\ No newline at end of file
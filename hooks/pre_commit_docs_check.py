@@ -6,12 +6,20 @@
 - 문서 누락 시 커밋을 차단하고 Claude에게 피드백
 """
 
+# git commit이 아닌 Bash 호출마다 실행되므로 최상단 import는 최소한으로 유지한다.
+# subprocess, unicodedata 등은 실제로 쓰는 함수 안에서 import (커밋이 아니면 로드하지 않음)
 import json
 import sys
-import subprocess
 import os
 import re
-from pathlib import Path
+
+_GIT_COMMIT_RE = re.compile(r'\bgit\s+commit\b')
+_CAMEL_RE = re.compile(r'^([A-Z][a-z]+)')
+# 모듈 단위 빌드에서 프로젝트/모듈을 찾지 못했을 때의 Gradle / Maven 에러
+_PROJECT_NOT_FOUND_RE = re.compile(r"[Pp]roject '[^']*' not found|Could not find the selected project")
+_FEATURE_MARKERS = frozenset(("controller", "service", "repository", "dto", "entity", "mapper"))
+_DOC_CACHE_VERSION = 3  # 캐시 형식이 바뀌면 올린다 (2: _doc_key 적용, 3: written_at 추가)
+_DOC_CACHE_RACY_NS = 2_000_000_000  # 이 시간(2초) 안에 바뀐 디렉토리는 캐시하지 않는다
 
 
 def get_input():
@@ -25,19 +33,24 @@ def get_input():
 def is_git_commit(command: str) -> bool:
     """git commit 명령인지 확인한다."""
     # git commit, git commit -m, git commit -am 등 매칭
-    return bool(re.search(r'\bgit\s+commit\b', command))
+    return bool(_GIT_COMMIT_RE.search(command))
 
 
 def get_staged_files(project_dir: str) -> list[str]:
-    """staged된 파일 목록을 반환한다."""
+    """
+    staged된 파일 목록을 반환한다.
+    -z(NUL 구분) 출력을 한 번에 파싱한다 — 한글 파일명도 인용/이스케이프 없이 그대로 받는다.
+    """
+    import subprocess
+
     result = subprocess.run(
-        ["git", "diff", "--cached", "--name-only"],
+        ["git", "diff", "--cached", "--name-only", "--ignore-submodules", "-z"],
         cwd=project_dir,
-        capture_output=True, text=True
+        capture_output=True
     )
     if result.returncode != 0:
         return []
-    return [f.strip() for f in result.stdout.strip().split("\n") if f.strip()]
+    return [f.decode("utf-8", "surrogateescape") for f in result.stdout.split(b"\0") if f]
 
 
 def extract_feature_names(java_files: list[str]) -> set[str]:
@@ -50,118 +63,307 @@ def extract_feature_names(java_files: list[str]) -> set[str]:
     for f in java_files:
         parts = f.split("/")
         # controller, service, repository 등의 상위 패키지명을 기능명으로 추정
-        for i, part in enumerate(parts):
-            if part in ("controller", "service", "repository", "dto", "entity", "mapper"):
-                if i > 0:
-                    feature_names.add(parts[i - 1].lower())
-                break
+        idx = next((i for i, part in enumerate(parts) if part in _FEATURE_MARKERS), -1)
+        if idx >= 0:
+            if idx > 0:
+                feature_names.add(parts[idx - 1].lower())
         # 패키지 구조가 다른 경우 — 파일명에서 추출
         else:
-            filename = Path(f).stem  # AttendanceController → AttendanceController
+            # 파일명(확장자 제외) — Path(f).stem과 동일, 객체 생성 없이 슬라이싱
+            base = f[f.rfind("/") + 1:]
+            dot = base.rfind(".")
+            filename = base if dot <= 0 else base[:dot]  # AttendanceController.java → AttendanceController
             # CamelCase에서 첫 단어 추출
-            match = re.match(r'^([A-Z][a-z]+)', filename)
+            match = _CAMEL_RE.match(filename)
             if match:
                 feature_names.add(match.group(1).lower())
     
     return feature_names
 
 
-def check_build(project_dir: str) -> str | None:
+def _build_cache_path(project_dir: str) -> str | None:
+    """
+    빌드 캐시 마커 경로를 반환한다. 캐시를 쓸 수 없으면 None.
+    키 = 인덱스 전체 트리 해시(git write-tree) → 빌드 파일이나 다른 소스가 바뀌어도 키가 달라진다.
+    빌드는 작업 트리를 컴파일하므로 unstaged 변경이나 untracked 파일이 있으면 캐시를 쓰지 않는다.
+    """
+    import subprocess
+
+    git_dir = os.path.join(project_dir, ".git")
+    if not os.path.isdir(git_dir):
+        return None  # worktree/submodule 등 .git이 파일인 경우 캐시 사용 안 함
+
+    # 작업 트리 == 인덱스인지 확인 (XY의 Y가 공백이 아니면 unstaged 변경, "??"는 untracked)
+    status = subprocess.run(
+        ["git", "status", "--porcelain", "-z", "--ignore-submodules", "--untracked-files=normal"],
+        cwd=project_dir,
+        capture_output=True
+    )
+    if status.returncode != 0:
+        return None
+    skip_next = False
+    for entry in status.stdout.split(b"\0"):
+        if skip_next:  # rename/copy 항목 뒤에 오는 원래 경로
+            skip_next = False
+            continue
+        if not entry:
+            continue
+        if entry[1:2] != b" ":
+            return None
+        skip_next = entry[:1] in (b"R", b"C")
+
+    tree = subprocess.run(["git", "write-tree"], cwd=project_dir, capture_output=True)
+    if tree.returncode != 0:
+        return None  # 충돌(unmerged) 상태 등
+    # 작업 트리 == 인덱스를 확인했으므로 인덱스 트리가 곧 컴파일 대상 전체 (HEAD와는 무관)
+    key = tree.stdout.strip().decode("ascii")
+    return os.path.join(git_dir, ".claude_build_cache", key)
+
+
+def _prune_build_cache(cache_dir: str, keep: int = 10):
+    """빌드 캐시 마커를 최근 사용한 keep개만 남기고 지운다."""
+    with os.scandir(cache_dir) as it:
+        markers = sorted(it, key=lambda e: e.stat().st_mtime_ns, reverse=True)
+    for e in markers[keep:]:
+        try:
+            os.unlink(e.path)
+        except OSError:
+            pass
+
+
+def _changed_modules(project_dir: str, java_files: list[str], build_files: tuple[str, ...]) -> set[str] | None:
+    """
+    변경된 Java 파일이 속한 모듈 디렉토리를 반환한다. (루트 모듈은 "")
+    예: app/src/main/java/com/erp/... → "app"
+    빌드 파일로 모듈을 확인할 수 없는 파일이 있으면 None (→ 전체 빌드).
+    """
+    modules = set()
+    for f in java_files:
+        idx = f.find("src/main/java/")
+        if idx < 0:
+            continue
+        if idx > 0 and f[idx - 1] != "/":
+            return None
+        module = f[:idx].rstrip("/")
+        if not any(os.path.exists(os.path.join(project_dir, module, b)) for b in build_files):
+            return None
+        modules.add(module)
+    return modules
+
+
+def check_build(project_dir: str, java_files: list[str]) -> str | None:
     """빌드를 확인한다. 실패 시 에러 메시지를 반환한다."""
-    # Gradle 프로젝트
-    gradlew = os.path.join(project_dir, "gradlew")
-    if os.path.exists(gradlew):
-        result = subprocess.run(
-            ["./gradlew", "compileJava", "-q"],
-            cwd=project_dir,
-            capture_output=True, text=True,
-            timeout=90
-        )
-        if result.returncode != 0:
-            return f"Gradle 빌드 실패:\n{result.stderr[:300]}"
+    import subprocess
+    import time
+
+    # 컴파일 대상(src/main/java) 변경이 없으면 빌드 스킵
+    if not any("src/main/java/" in f for f in java_files):
         return None
 
-    # Maven 프로젝트
-    pom = os.path.join(project_dir, "pom.xml")
-    if os.path.exists(pom):
-        result = subprocess.run(
-            ["mvn", "compile", "-q"],
-            cwd=project_dir,
-            capture_output=True, text=True,
-            timeout=90
-        )
-        if result.returncode != 0:
-            return f"Maven 빌드 실패:\n{result.stderr[:300]}"
+    # 변경 파일이 속한 모듈만 빌드 (모듈을 특정할 수 없거나 루트 모듈이면 전체 빌드)
+    scoped_command = None
+    if os.path.exists(os.path.join(project_dir, "gradlew")):
+        # Gradle 프로젝트
+        tool, command = "Gradle", ["./gradlew", "compileJava", "-q"]
+        modules = _changed_modules(project_dir, java_files, ("build.gradle", "build.gradle.kts"))
+        if modules and modules != {""}:
+            tasks = [f":{m.replace('/', ':')}:compileJava" if m else ":compileJava" for m in sorted(modules)]
+            scoped_command = ["./gradlew", *tasks, "-q"]
+            if len(tasks) > 1:
+                scoped_command.append("--parallel")
+    elif os.path.exists(os.path.join(project_dir, "pom.xml")):
+        # Maven 프로젝트
+        tool, command = "Maven", ["mvn", "compile", "-q"]
+        modules = _changed_modules(project_dir, java_files, ("pom.xml",))
+        if modules and "" not in modules:
+            scoped_command = ["mvn", "compile", "-q", "-pl", ",".join(sorted(modules)), "-am"]
+    else:
+        return None  # 빌드 도구를 못 찾으면 스킵
+
+    # 같은 staged 트리로 이미 빌드에 성공했다면 스킵
+    cache_path = _build_cache_path(project_dir)
+    if cache_path and os.path.exists(cache_path):
+        os.utime(cache_path)  # 최근 사용 표시 (정리 시 남길 순서)
         return None
 
-    return None  # 빌드 도구를 못 찾으면 스킵
+    deadline = time.monotonic() + 90
+    result = subprocess.run(
+        scoped_command or command,
+        cwd=project_dir,
+        capture_output=True, text=True,
+        timeout=90
+    )
+    # 모듈 경로 → 프로젝트 매핑이 틀려 프로젝트를 못 찾은 경우에만 전체 빌드로 재확인
+    # (settings.gradle의 projectDir 재지정, reactor에 없는 모듈 등). 컴파일 에러는 그대로 보고
+    if (scoped_command and result.returncode != 0
+            and _PROJECT_NOT_FOUND_RE.search(result.stderr + result.stdout)):
+        try:
+            result = subprocess.run(
+                command,
+                cwd=project_dir,
+                capture_output=True, text=True,
+                timeout=max(1, deadline - time.monotonic())
+            )
+        except subprocess.TimeoutExpired:
+            pass  # 남은 시간 안에 끝나지 않으면 모듈 단위 빌드 실패를 보고
+    if result.returncode != 0:
+        return f"{tool} 빌드 실패:\n{result.stderr[:300]}"
+
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        open(cache_path, "w").close()
+        _prune_build_cache(os.path.dirname(cache_path))
+    return None
 
 
-def check_docs(project_dir: str, feature_names: set[str], staged_files: list[str]) -> list[str]:
+def _doc_key(name: str) -> str:
     """
-    기능별 필수 문서 존재 여부를 확인한다.
-    반환: 누락된 문서 에러 메시지 리스트
+    문서 파일명 비교용 키.
+    macOS(HFS+)는 한글 파일명을 NFD로 돌려주므로 NFC로 맞추고, 대소문자를 구분하지 않는
+    파일시스템(macOS, Windows)에서 os.path.exists가 하던 것처럼 대소문자를 무시한다.
     """
+    import unicodedata
+
+    return unicodedata.normalize("NFC", name).casefold()
+
+
+def _listdir_set(path: str) -> set[str]:
+    """디렉토리의 파일명 집합(_doc_key 기준)을 반환한다. (디렉토리가 없으면 빈 집합)"""
+    if not os.path.isdir(path):
+        return set()
+    with os.scandir(path) as it:
+        return {_doc_key(e.name) for e in it}
+
+
+def _doc_cache_settled(mtimes: list[int | None], written_at: int) -> bool:
+    """모든 디렉토리 mtime이 캐시 기록 시각보다 충분히(_DOC_CACHE_RACY_NS) 이전인지 확인한다."""
+    return all(m is None or m <= written_at - _DOC_CACHE_RACY_NS for m in mtimes)
+
+
+def _doc_sets(project_dir: str) -> tuple[set[str], ...]:
+    """
+    src/docs, src/docs/architecture, src/docs/user-guide의 파일명 집합을 반환한다.
+    세 디렉토리의 mtime이 그대로면 .git/.claude_doc_cache.json에 저장된 결과를 재사용한다.
+    (파일 추가/삭제/이름 변경 시 디렉토리 mtime이 바뀌므로 캐시는 자동 무효화)
+
+    mtime 해상도가 거친 파일시스템(HFS+ 1초 등)에서는 캐시를 쓴 직후 같은 시각에 파일이
+    추가되면 mtime이 그대로일 수 있다. racy-git과 같은 방식으로, 캐시 기록 시각과
+    _DOC_CACHE_RACY_NS 이내로 가까운 mtime이 있으면 캐시를 쓰지도 믿지도 않는다.
+    """
+    import time
+
     docs_dir = os.path.join(project_dir, "src", "docs")
+    dirs = (docs_dir, os.path.join(docs_dir, "architecture"), os.path.join(docs_dir, "user-guide"))
+    now = time.time_ns()
+    mtimes = []
+    for d in dirs:
+        try:
+            mtimes.append(os.stat(d).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+
+    git_dir = os.path.join(project_dir, ".git")
+    cache_path = os.path.join(git_dir, ".claude_doc_cache.json") if os.path.isdir(git_dir) else None
+    if cache_path:
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if (cached["version"] == _DOC_CACHE_VERSION and cached["mtimes"] == mtimes
+                    and _doc_cache_settled(mtimes, cached["written_at"])):
+                return tuple(set(names) for names in cached["sets"])
+        except (OSError, ValueError, LookupError, TypeError):
+            pass  # 캐시 없음/손상 → 다시 스캔
+
+    sets = tuple(_listdir_set(d) for d in dirs)
+    if cache_path and _doc_cache_settled(mtimes, now):
+        try:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _DOC_CACHE_VERSION, "written_at": now, "mtimes": mtimes, "sets": [sorted(names) for names in sets]}, f, ensure_ascii=False)
+        except OSError:
+            pass
+    return sets
+
+
+def check_docs(project_dir: str, feature_names: set[str], staged_files: list[str]) -> list[str]:
+    """
+    기능별 필수 문서 존재 여부와 staged 문서 포함 여부를 확인한다.
+    반환: 누락된 문서 에러/경고 메시지 리스트
+    """
     errors = []
 
-    # ── 전역 문서 체크 ──
-    error_messages_path = os.path.join(docs_dir, "ERROR_MESSAGES.md")
-    if not os.path.exists(error_messages_path):
-        errors.append("📄 ERROR_MESSAGES.md가 존재하지 않습니다 → src/docs/ERROR_MESSAGES.md 생성 필요")
+    # staged 파일 목록은 한 번만 훑는다 — 파일명 집합(_doc_key 기준) + src/docs/ 하위 포함 여부
+    staged_basenames = set()
+    staged_under_docs = False
+    for f in staged_files:
+        staged_basenames.add(_doc_key(f.rsplit("/", 1)[-1]))
+        if f.startswith("src/docs/"):
+            staged_under_docs = True
 
-    # ERROR_MESSAGES.md가 존재하는데 staged에 없으면 경고 (업데이트 안 했을 수 있음)
-    elif not any("ERROR_MESSAGES.md" in f for f in staged_files):
-        errors.append("⚠️ ERROR_MESSAGES.md가 이번 커밋에 포함되지 않았습니다. 새 에러 코드 추가가 필요하지 않은지 확인하세요")
+    if feature_names:
+        # 문서 디렉토리별 파일명 집합 — 파일마다 stat 하지 않고 디렉토리당 한 번만 읽는다 (mtime 캐시)
+        docs, arch_docs, guide_docs = _doc_sets(project_dir)
 
-    # ── 기능별 문서 체크 ──
-    for feature in feature_names:
-        missing = []
+        # ── 전역 문서 체크 ──
+        if _doc_key("ERROR_MESSAGES.md") not in docs:
+            errors.append("📄 ERROR_MESSAGES.md가 존재하지 않습니다 → src/docs/ERROR_MESSAGES.md 생성 필요")
 
-        # 기능명세서: {feature}_기능명세서.md 또는 {Feature}_기능명세서.md
-        spec_patterns = [
-            os.path.join(docs_dir, f"{feature}_기능명세서.md"),
-            os.path.join(docs_dir, f"{feature.capitalize()}_기능명세서.md"),
-        ]
-        if not any(os.path.exists(p) for p in spec_patterns):
-            missing.append(f"  - 기능명세서: src/docs/{feature}_기능명세서.md")
+        # ERROR_MESSAGES.md가 존재하는데 staged에 없으면 경고 (업데이트 안 했을 수 있음)
+        elif _doc_key("ERROR_MESSAGES.md") not in staged_basenames:
+            errors.append("⚠️ ERROR_MESSAGES.md가 이번 커밋에 포함되지 않았습니다. 새 에러 코드 추가가 필요하지 않은지 확인하세요")
 
-        # 아키텍처 설명서
-        arch_path = os.path.join(docs_dir, "architecture", f"{feature}.md")
-        if not os.path.exists(arch_path):
-            missing.append(f"  - 아키텍처 설명서: src/docs/architecture/{feature}.md")
+        # ── 기능별 문서 체크 ──
+        for feature in feature_names:
+            missing = []
 
-        # 사용자매뉴얼
-        guide_path = os.path.join(docs_dir, "user-guide", f"{feature}.md")
-        if not os.path.exists(guide_path):
-            missing.append(f"  - 사용자매뉴얼: src/docs/user-guide/{feature}.md")
+            # 기능명세서: {feature}_기능명세서.md (대소문자 무관 — {Feature}_기능명세서.md 포함)
+            if _doc_key(f"{feature}_기능명세서.md") not in docs:
+                missing.append(f"  - 기능명세서: src/docs/{feature}_기능명세서.md")
 
-        if missing:
-            errors.append(f"📁 기능 '{feature}' 관련 문서 누락:\n" + "\n".join(missing))
+            # 아키텍처 설명서
+            if _doc_key(f"{feature}.md") not in arch_docs:
+                missing.append(f"  - 아키텍처 설명서: src/docs/architecture/{feature}.md")
 
-    return errors
+            # 사용자매뉴얼
+            if _doc_key(f"{feature}.md") not in guide_docs:
+                missing.append(f"  - 사용자매뉴얼: src/docs/user-guide/{feature}.md")
 
+            if missing:
+                errors.append(f"📁 기능 '{feature}' 관련 문서 누락:\n" + "\n".join(missing))
 
-def check_staged_docs(staged_files: list[str]) -> str | None:
-    """staged에 문서 파일이 하나도 없으면 경고."""
-    doc_files = [f for f in staged_files if f.startswith("src/docs/")]
-    if not doc_files:
-        return (
+    # ── staged에 문서 파일이 하나도 없으면 경고 ──
+    if not staged_under_docs:
+        errors.append(
             "⚠️ 이번 커밋에 src/docs/ 하위 문서가 하나도 포함되지 않았습니다.\n"
             "   기능 코드를 변경했다면 관련 문서도 함께 커밋하세요."
         )
-    return None
+
+    return errors
 
 
 def deny(reason: str):
     """커밋을 차단하고 Claude에게 피드백."""
-    print(json.dumps({
+    try:
+        from orjson import dumps
+    except ImportError:
+        def dumps(obj) -> bytes:
+            return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    payload = {
         "hookSpecificOutput": {
             "hookEventName": "PreToolUse",
             "permissionDecision": "deny",
             "permissionDecisionReason": reason
         }
-    }))
+    }
+    try:
+        data = dumps(payload)
+    except (TypeError, UnicodeEncodeError):
+        # UTF-8이 아닌 경로(surrogateescape로 디코딩된 lone surrogate)가 섞인 경우 — \u 이스케이프로 직렬화
+        data = json.dumps(payload).encode("ascii")
+
+    # 직렬화한 바이트를 stdout 버퍼에 한 번에 기록
+    sys.stdout.buffer.write(data + b"\n")
+    sys.stdout.buffer.flush()
     sys.exit(0)
 
 
@@ -192,23 +394,24 @@ def main():
         sys.exit(0)
 
     # ── 검증 시작 ──
+    from concurrent.futures import ThreadPoolExecutor
+
     all_errors = []
 
-    # 1. 빌드 확인
-    build_error = check_build(project_dir)
-    if build_error:
-        all_errors.append(f"❌ {build_error}")
+    # 빌드(수 초~수십 초)는 백그라운드 스레드에서 돌리고, 그동안 문서 체크를 진행
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        build_future = executor.submit(check_build, project_dir, java_changes)
 
-    # 2. 기능명 추출 & 문서 존재 확인
-    feature_names = extract_feature_names(java_changes)
-    if feature_names:
+        # 2. 기능명 추출 & 문서 존재 / staged 문서 포함 여부 확인
+        feature_names = extract_feature_names(java_changes)
         doc_errors = check_docs(project_dir, feature_names, staged_files)
-        all_errors.extend(doc_errors)
 
-    # 3. staged에 문서 포함 여부
-    staged_warning = check_staged_docs(staged_files)
-    if staged_warning:
-        all_errors.append(staged_warning)
+        # 1. 빌드 확인
+        build_error = build_future.result()
+
+    if build_error:
+        all_errors.append(f"❌ {build_error}")
+    all_errors.extend(doc_errors)
 
     # ── 결과 ──
     if all_errors: